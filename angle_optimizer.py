@@ -0,0 +1,187 @@
+import json
+import os
+import warnings
+import numpy as np
+
+# Lookup table of optimal strategies, keyed by the number of players
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'optimal_angles.json')
+
+PAULI_Z = np.diag([1, -1]).astype(complex)
+
+
+def rz(theta: np.ndarray) -> np.ndarray:
+    """Batched rotation about Z, the convention of Qubit.rz."""
+    phase = np.exp(-0.5j * theta)
+    out = np.zeros(theta.shape + (2, 2), dtype=complex)
+    out[..., 0, 0] = phase
+    out[..., 1, 1] = phase.conj()
+    return out
+
+
+def ry(theta: np.ndarray) -> np.ndarray:
+    """Batched rotation about Y, the convention of Qubit.ry."""
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.stack([np.stack([c, -s], -1), np.stack([s, c], -1)], -2).astype(complex)
+
+
+def unitaries(params: np.ndarray) -> np.ndarray:
+    """
+    The single qubit unitary of every (rz, ry, rz) parameter triple in the
+    last axis of *params*, applied in that order: U = Rz(p2) Ry(p1) Rz(p0).
+    """
+    return rz(params[..., 2]) @ ry(params[..., 1]) @ rz(params[..., 0])
+
+
+def win_probability(params) -> np.ndarray:
+    """
+    Exact probability of winning the n player Mermin-Ardehali game when every
+    player measures their GHZ qubit in Z after their rotations.
+
+    Player i applies the rotations params[i, x] when asked x. The parity of
+    the answers has expectation 1/2 sum_ab prod_i <a|U_i^+ Z U_i|b> on the
+    GHZ state, and the winning answer only depends on sum(x) mod 4. Averaging
+    over all 2^n questions is therefore a product of n polynomials modulo
+    t^4 - 1, so the cost is linear in n instead of exponential.
+
+    Parameters
+    ----------
+    params : array_like
+        Rotation angles of shape (..., n, 2, 3), any leading axes are batched
+
+    Returns
+    -------
+    np.ndarray
+        The win probabilities, of shape (...)
+    """
+    params = np.asarray(params, dtype=float)
+    n = params.shape[-3]
+    u = unitaries(params)
+    # M[..., i, x, a, b] = <a|U^+ Z U|b>
+    m = np.conj(np.swapaxes(u, -1, -2)) @ PAULI_Z @ u
+
+    # coeffs[..., a, b, k]: sum over questions with sum(x) = k mod 4
+    coeffs = np.zeros(params.shape[:-3] + (2, 2, 4), dtype=complex)
+    coeffs[..., 0] = 1
+    for i in range(n):
+        m0 = m[..., i, 0, :, :, None]
+        m1 = m[..., i, 1, :, :, None]
+        coeffs = coeffs * m0 + np.roll(coeffs, 1, axis=-1) * m1
+
+    # The referee expects even parity for sum(x) = 0, 1 mod 4 and odd otherwise
+    signed = coeffs[..., 0] + coeffs[..., 1] - coeffs[..., 2] - coeffs[..., 3]
+    correlation = 0.5 * signed.sum(axis=(-1, -2)).real
+    return 0.5 + correlation / 2 ** (n + 1)
+
+
+def uniform_params(n: int) -> np.ndarray:
+    """The hand derived strategy that every player shares, of shape (n, 2, 3)."""
+    angle = ((((2 * n) + 1) % 8) * np.pi) / (4 * n)
+    per_question = [[-(np.pi / 2 + angle), -np.pi / 2, -(np.pi / 2 + angle)],
+                    [-angle, -np.pi / 2, -angle]]
+    return np.tile(np.array(per_question), (n, 1, 1))
+
+
+def optimize(n: int, restarts=32, steps=400, lr=0.2, tol=1e-12, seed=None):
+    """
+    Search for the strategy with the highest win probability by gradient
+    ascent from *restarts* starting points at once, one of them the uniform
+    hand derived strategy. The gradient is taken by central differences over
+    all parameters of all restarts in a single batched evaluation. Stops after
+    *steps* steps or once the best win probability improves by less than *tol*.
+
+    Returns
+    -------
+    (np.ndarray, float, bool)
+        The best parameters, shape (n, 2, 3), their win probability, and
+        whether the search converged before running out of steps
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-np.pi, np.pi, (restarts, n, 2, 3))
+    x[0] = uniform_params(n)
+
+    size = n * 2 * 3
+    eps = 1e-4
+    shifts = np.concatenate([np.eye(size), -np.eye(size)]).reshape(2 * size, n, 2, 3) * eps
+    last = None
+    converged = False
+    for _ in range(steps):
+        probs = win_probability(x[:, None] + shifts)
+        grad = (probs[:, :size] - probs[:, size:]).reshape(x.shape) / (2 * eps)
+        x = x + lr * grad
+        # Stop once the best restart no longer improves
+        best = probs.max()
+        if last is not None and best - last < tol:
+            converged = True
+            break
+        last = best
+
+    probs = win_probability(x)
+    best = int(np.argmax(probs))
+    params = np.mod(x[best] + np.pi, 2 * np.pi) - np.pi
+    return params, float(win_probability(params)), converged
+
+
+def load_table(path=TABLE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_table(table: dict, path=TABLE_PATH):
+    """
+    Write *table* to *path* through a temporary file, so that processes
+    reading or writing the table at the same time never see a partial file.
+    """
+    table = dict(sorted(table.items(), key=lambda item: int(item[0])))
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(table, f, indent=1)
+            f.write('\n')
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def store(table: dict, n: int, params: np.ndarray, p: float) -> bool:
+    """
+    Store the strategy *params* with win probability *p* for *n* players in
+    *table*, unless the table already has one at least as good.
+
+    Returns
+    -------
+    bool
+        True if the table changed
+    """
+    entry = table.get(str(n))
+    if entry is not None and p <= entry['win_probability']:
+        return False
+    table[str(n)] = {'win_probability': p, 'params': params.round(12).tolist()}
+    return True
+
+
+def optimal_params(n: int, path=TABLE_PATH, **kwargs):
+    """
+    Look up the optimal strategy for *n* players, computing and storing it
+    first if the table does not have it yet. A search that does not converge
+    is used but not stored.
+
+    Returns
+    -------
+    (np.ndarray, float)
+        The parameters, shape (n, 2, 3), and their win probability
+    """
+    table = load_table(path)
+    entry = table.get(str(n))
+    if entry is None:
+        params, p, converged = optimize(n, **kwargs)
+        if not converged:
+            warnings.warn('The angle search for n=%d did not converge, not storing it' % n)
+            return params, p
+        store(table, n, params, p)
+        save_table(table, path)
+        entry = table[str(n)]
+    return np.array(entry['params']), entry['win_probability']
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#
+#  Aggregate throughput of concurrent superdense coding sessions into one
+#  receiver as the number of senders grows (hw4_todo.multi_main).
+#
+#  Usage: python benchmarks/bench_multi_session.py [--senders 1 2 4 8] [--delay 0]
+#
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fresh_process import in_fresh_process
+
+
+def run_sessions(senders, p, delay, seed):
+    """Run *senders* sessions, in a process of their own."""
+    import hw4_todo
+
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return hw4_todo.multi_main(senders, p, delay=delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-sender superdense coding throughput.')
+    parser.add_argument('--senders', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--p', type=float, default=0.75,
+                        help='probability that a data frame is ready to send')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='network delay per packet in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%8s %10s %10s %12s %12s %8s' %
+          ('senders', 'bits', 'seconds', 'bits/s', 'per sender', 'intact'))
+    for senders in args.senders:
+        r = in_fresh_process(run_sessions, senders, args.p, args.delay, args.seed)
+        print('%8d %10d %10.2f %12.1f %12.1f %8s' %
+              (senders, r['bits'], r['seconds'], r['throughput'],
+               r['throughput'] / senders, r['intact']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+#
+#  Qubit allocations and wall time of the hw1 transport with and without
+#  recycling measured qubits through a qubit_pool.QubitPool.
+#
+#  Usage: python benchmarks/bench_qubit_pool.py [--size BYTES] [--cap N]
+#
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import random
+import string
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fresh_process import in_fresh_process
+
+
+def run_transfer(size, cap, seed):
+    """
+    Send *size* bytes with hw1, in a process of its own, and return the pool
+    counters, the GC collections and the wall time. The network delay is 0 so
+    that the backend, not the simulated link, is timed.
+    """
+    import hw1_todo
+    from qunetsim import Network
+
+    Network.get_instance().delay = 0.0
+
+    random.seed(seed)
+    payload = ''.join(random.choice(string.ascii_letters) for _ in range(size))
+
+    collections = sum(s['collections'] for s in gc.get_stats())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pool = hw1_todo.main(payload, pool_cap=cap)
+    elapsed = time.perf_counter() - start
+
+    result = pool.stats
+    result['gc_collections'] = sum(s['collections'] for s in gc.get_stats()) - collections
+    result['seconds'] = elapsed
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark qubit recycling in hw1.')
+    parser.add_argument('--size', type=int, default=256, help='payload size in bytes')
+    parser.add_argument('--cap', type=int, default=1024, help='pool cap for the pooled run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # A cap of 0 never reuses a qubit, which is the original behaviour
+    runs = [('no pool', 0), ('pool cap=%d' % args.cap, args.cap)]
+    results = []
+    for _, cap in runs:
+        results.append(in_fresh_process(run_transfer, args.size, cap, args.seed))
+
+    print('%d byte payload (%d qubits)' % (args.size, 8 * args.size))
+    print('%-16s %12s %12s %10s %10s' % ('', 'allocated', 'reused', 'gc runs', 'seconds'))
+    for (name, _), r in zip(runs, results):
+        print('%-16s %12d %12d %10d %10.2f' % (name, r['allocated'], r['reused'],
+                                              r['gc_collections'], r['seconds']))
+    base, pooled = results
+    if args.cap and not pooled['reused']:
+        raise Exception('The pooled run never reused a qubit')
+    print('Allocations: %.1fx fewer, wall time: %.2fx' %
+          (base['allocated'] / max(pooled['allocated'], 1), base['seconds'] / pooled['seconds']))
+
+
+if __name__ == '__main__':
+    main()
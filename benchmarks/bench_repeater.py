@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#
+#  End-to-end EPR establishment latency and superdense coded goodput over a
+#  repeater chain or mesh as the hop count grows (repeater.main).
+#
+#  Usage: python benchmarks/bench_repeater.py [--hops 1 2 4 8] [--topology line]
+#
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fresh_process import in_fresh_process
+
+
+def run_chain(hops, topology, delay, seed):
+    """Run one hop count, in a process of its own."""
+    import repeater
+
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return repeater.main(hops, topology, delay=delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Repeater chain latency and goodput.')
+    parser.add_argument('--hops', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--topology', choices=['line', 'mesh'], default='line')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='network delay per packet in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%5s %14s %14s %12s %14s %8s' %
+          ('hops', 'EPR mean (ms)', 'EPR max (ms)', 'bits/s', 'bits/use', 'intact'))
+    for hops in args.hops:
+        r = in_fresh_process(run_chain, hops, args.topology, args.delay, args.seed)
+        print('%5d %14.2f %14.2f %12.1f %14.3f %8s' %
+              (r['hops'], 1000 * r['epr_latency_mean'], 1000 * r['epr_latency_max'],
+               r['goodput'], r['bits_per_channel_use'], r['intact']))
+
+
+if __name__ == '__main__':
+    main()
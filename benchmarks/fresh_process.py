@@ -0,0 +1,15 @@
+#
+#  Helper shared by the benchmarks and tests that run QuNetSim simulations.
+#
+#  QuNetSim's Network and the EQSN backend are per process singletons, so a
+#  simulation that has been stopped cannot be started again in the same
+#  process. Every run therefore gets a process of its own.
+#
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+def in_fresh_process(fn, *args):
+    """Run *fn* with *args* in a new process and return its result."""
+    with ProcessPoolExecutor(max_workers=1) as ex:
+        return ex.submit(fn, *args).result()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+#
+#  Benchmark regression suite for the games and transports.
+#
+#  Measures rounds per second of the Mermin-Ardehali and CHSH games, bits per
+#  second and channel uses per payload bit of the hw1 and hw4 transports, and
+#  the peak resident memory of every case, including the EQSN worker
+#  processes that hold the qubit state. Each case runs in a fresh process
+#  with the network delay set to 0, so that the simulation itself is measured.
+#
+#  Usage:
+#    python benchmarks/regression.py              compare against baseline.json
+#    python benchmarks/regression.py --save       record a new baseline
+#    python benchmarks/regression.py --cases hw1 hw4 --threshold 0.3
+#
+#  Exits with status 1 when any metric is worse than the baseline by more
+#  than the threshold.
+#
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fresh_process import in_fresh_process
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Bump when cases or metrics change, baselines of another version are not comparable
+BASELINE_VERSION = 2
+
+# Whether a larger value of a metric is better
+HIGHER_IS_BETTER = {
+    'rounds_per_s': True,
+    'bits_per_s': True,
+    'channel_uses_per_bit': False,
+    'peak_rss_kb': False,
+}
+
+MERMIN_PLAYERS = 3
+MERMIN_ROUNDS = 20
+CHSH_ROUNDS = 20
+HW1_PAYLOAD = 'Superdense coding doubles capacity'
+
+
+def quiet_network():
+    from qunetsim import Network, Logger
+    Logger.DISABLED = True
+    Network.get_instance().delay = 0.0
+
+
+def case_mermin():
+    import importlib
+    game = importlib.import_module('mermin-ardehali')
+    quiet_network()
+    start = time.perf_counter()
+    game.main(n=MERMIN_PLAYERS, plays=MERMIN_ROUNDS)
+    return {'rounds_per_s': MERMIN_ROUNDS / (time.perf_counter() - start)}
+
+
+def case_chsh():
+    import chsh
+    quiet_network()
+    start = time.perf_counter()
+    chsh.main(rounds=CHSH_ROUNDS)
+    return {'rounds_per_s': CHSH_ROUNDS / (time.perf_counter() - start)}
+
+
+def case_hw1():
+    import hw1_todo
+    quiet_network()
+    stats = {}
+    start = time.perf_counter()
+    hw1_todo.main(HW1_PAYLOAD, stats=stats)
+    elapsed = time.perf_counter() - start
+    if not stats['success']:
+        raise Exception('hw1 payload arrived corrupted')
+    bits = 8 * len(HW1_PAYLOAD)
+    return {'bits_per_s': bits / elapsed,
+            'channel_uses_per_bit': stats['channel_uses'] / bits}
+
+
+def case_hw4():
+    import hw4_todo
+    stats = hw4_todo.multi_main(senders=1, delay=0.0)
+    if not stats['intact']:
+        raise Exception('hw4 payload arrived corrupted')
+    return {'bits_per_s': stats['throughput'],
+            'channel_uses_per_bit': stats['channel_uses'] / stats['bits']}
+
+
+CASES = {
+    'mermin': case_mermin,
+    'chsh': case_chsh,
+    'hw1': case_hw1,
+    'hw4': case_hw4,
+}
+
+
+def run_case(name, seed):
+    """
+    Run one case in this (fresh) process and add its peak memory: that of this
+    process plus the largest of its children. The cases stop the network, which
+    joins the EQSN workers, so their usage is accounted to RUSAGE_CHILDREN.
+    """
+    random.seed(seed)
+    import numpy as np
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = CASES[name]()
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss +
+           resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    result['peak_rss_kb'] = rss // 1024 if sys.platform == 'darwin' else rss
+    return result
+
+
+def measure(name, repeat, seed):
+    """Best value of every metric over *repeat* runs of case *name*."""
+    runs = []
+    for i in range(repeat):
+        runs.append(in_fresh_process(run_case, name, seed + i))
+    best = {}
+    for metric in runs[0]:
+        values = [run[metric] for run in runs]
+        best[metric] = max(values) if HIGHER_IS_BETTER[metric] else min(values)
+    return best
+
+
+def compare(results, baseline, threshold):
+    """
+    Print every metric against its baseline and return the regressions,
+    metrics that are worse than the baseline by more than *threshold*.
+    """
+    regressions = []
+    print('%-8s %-22s %14s %14s %9s' % ('case', 'metric', 'baseline', 'current', 'change'))
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None:
+                print('%-8s %-22s %14s %14.3f %9s' % (name, metric, '-', value, 'new'))
+                continue
+            change = (value - base) / base if base else 0.0
+            worse = -change if HIGHER_IS_BETTER[metric] else change
+            flag = ''
+            if worse > threshold:
+                regressions.append((name, metric))
+                flag = '  REGRESSION'
+            print('%-8s %-22s %14.3f %14.3f %+8.1f%%%s' %
+                  (name, metric, base, value, 100 * change, flag))
+    return regressions
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark regression suite.')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per case, the best value of each metric is kept')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative slowdown that counts as a regression')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help='write the results as the new baseline instead of comparing')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = {name: measure(name, args.repeat, args.seed) for name in args.cases}
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                old = json.load(f)
+            if old.get('version') == BASELINE_VERSION:
+                baseline = old['results']
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'version': BASELINE_VERSION, 'revision': git_revision(),
+                       'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': baseline}, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print('Saved baseline for %s to %s' % (', '.join(results), args.baseline))
+        return
+
+    if not os.path.exists(args.baseline):
+        raise SystemExit('No baseline at %s, record one with --save' % args.baseline)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise SystemExit('Baseline version %s does not match suite version %d, rerun with --save'
+                         % (baseline.get('version'), BASELINE_VERSION))
+
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print('%d metric(s) regressed by more than %.0f%%' %
+              (len(regressions), 100 * args.threshold))
+        sys.exit(1)
+    print('No regressions beyond %.0f%%' % (100 * args.threshold))
+
+
+if __name__ == '__main__':
+    main()
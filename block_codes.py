@@ -0,0 +1,104 @@
+import numpy as np
+
+# Generator matrix of the Hamming(7,4) code with the parity bits at positions
+# 1, 2 and 4, so that the syndrome of a single error is its position.
+HAMMING_G = np.array([[1, 1, 1, 0, 0, 0, 0],
+                      [1, 0, 0, 1, 1, 0, 0],
+                      [0, 1, 0, 1, 0, 1, 0],
+                      [1, 1, 0, 1, 0, 0, 1]], dtype=np.uint8)
+
+# Parity check matrix, column j is the binary representation of j + 1
+HAMMING_H = np.array([[((j + 1) >> b) & 1 for j in range(7)] for b in range(3)], dtype=np.uint8)
+
+# Codeword positions holding the data bits
+HAMMING_DATA = [2, 4, 5, 6]
+
+
+def to_bits(bits) -> np.ndarray:
+    """Convert a string of '0' and '1' or a sequence of ints to a bit array."""
+    if isinstance(bits, str):
+        return np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+    return np.asarray(bits, dtype=np.uint8)
+
+
+class Hamming74():
+    """
+    Hamming(7,4) code, corrects one flipped bit in every block of seven.
+    """
+    k = 4
+    n = 7
+
+    def encode(self, bits) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        bits : str or array_like
+            Data bits, a multiple of 4 long
+
+        Returns
+        -------
+        np.ndarray
+            The codewords, 7 bits per 4 data bits
+        """
+        data = to_bits(bits).reshape(-1, self.k)
+        return (data @ HAMMING_G % 2).astype(np.uint8).ravel()
+
+    def decode(self, bits) -> np.ndarray:
+        """
+        Correct single bit errors with a syndrome lookup over all blocks at once.
+
+        Parameters
+        ----------
+        bits : str or array_like
+            Received codewords, a multiple of 7 long
+
+        Returns
+        -------
+        np.ndarray
+            The decoded data bits
+        """
+        blocks = to_bits(bits).reshape(-1, self.n).copy()
+        syndrome = (blocks @ HAMMING_H.T % 2) @ np.array([1, 2, 4])
+        errors = np.nonzero(syndrome)[0]
+        blocks[errors, syndrome[errors] - 1] ^= 1
+        return blocks[:, HAMMING_DATA].ravel()
+
+
+class Repetition():
+    """
+    Repetition code sending every bit *n* times, decoded by majority vote.
+    """
+    k = 1
+
+    def __init__(self, n=3):
+        if n < 1 or n % 2 == 0:
+            raise Exception('The repetition count must be a positive odd number')
+        self.n = n
+
+    def encode(self, bits) -> np.ndarray:
+        return np.repeat(to_bits(bits), self.n)
+
+    def decode(self, bits) -> np.ndarray:
+        votes = to_bits(bits).reshape(-1, self.n).sum(axis=1, dtype=np.int64)
+        return (2 * votes > self.n).astype(np.uint8)
+
+
+def get_code(name):
+    """
+    Look up a block code by name: 'none', 'hamming' or 'rep<n>' for an odd n,
+    e.g. 'rep3'. Returns None for 'none'.
+    """
+    if name is None or name == 'none':
+        return None
+    if name == 'hamming':
+        return Hamming74()
+    if name.startswith('rep') and name[3:].isdigit():
+        return Repetition(int(name[3:]))
+    raise Exception('Unknown block code %s' % name)
+
+
+def coded_length(code, bits: int) -> int:
+    """Number of channel bits used to send *bits* data bits with *code*."""
+    if code is None:
+        return bits
+    return bits // code.k * code.n
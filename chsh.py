@@ -9,27 +9,31 @@
 ## IMPORTS
 import numpy as np
 import random
-from threading import Thread, Event
+from threading import Thread
 from qunetsim.components import Host
 from qunetsim.components import Network
 from qunetsim.objects import Qubit
 from qunetsim.objects import Logger
+from polling import get_next_classical, get_qubit
 
-Logger.DISABLED = False
+Logger.DISABLED = True
 
 ## CONSTANTS
 STRATEGY_A = [0, np.pi/4]
 STRATEGY_B = [np.pi/8, -np.pi/8]
+ROUNDS = 10
 
 def get_unitary(angle):
     return np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
 
 class Referee():
-    def __init__(self):
-        self.host = Host('Referee')
-        self.question = None
+    def __init__(self, rounds=ROUNDS, backend=None):
+        self.host = Host('Referee', backend=backend)
+        self.questions = None
         self.players = []
         self.proto = None
+        self.rounds = rounds
+        self.wins = 0
 
     def register_player(self, player):
         self.players.append(player)
@@ -40,10 +44,10 @@ class Referee():
     def evaluate_answers(self, answers):
         
         q = 1
-        for questions in self.question:
+        for questions in self.questions:
             q *= questions
         
-        ans = 0
+        a = 0
         for answer in answers:
             a = a ^ answer
         
@@ -53,7 +57,7 @@ class Referee():
             return False
 
     def protocol(self):
-        while True:
+        for _ in range(self.rounds):
             self.generate_questions()
             for i, player in enumerate(self.players):
                 self.host.send_classical(player.host.host_id, self.questions[i])
@@ -61,11 +65,13 @@ class Referee():
             answers = []
             strategies = []
             for i, player in enumerate(self.players):
-                msg = player.host.get_classical(player.host.host_id, wait = -1)[-1]
+                msg = get_next_classical(self.host, player.host.host_id, wait=-1)
                 msg = msg.content.split(",")
                 answers.append(int(msg[0]))
                 strategies.append(msg[1])
             res = self.evaluate_answers(answers)
+            if res:
+                self.wins += 1
             print(answers)
 
     def run(self):
@@ -73,9 +79,10 @@ class Referee():
         self.proto.start()
 
 class Player():
-    def __init__(self, strategy, name):
-        self.host = Host(name)
+    def __init__(self, strategy, name, rounds=ROUNDS, backend=None):
+        self.host = Host(name, backend=backend)
         self.strategy = strategy
+        self.rounds = rounds
         self.referee = None
         self.epr_gen = None
         self.qubit = None
@@ -89,7 +96,7 @@ class Player():
 
     def request_epr(self):
         self.host.send_classical(self.epr_gen.host.host_id, "0")
-        self.host.get_data_qubit(self.epr_gen.host.host_id, wait = 1)
+        self.qubit = get_qubit(self.host, self.epr_gen.host.host_id, wait = 10)
         if self.qubit is None:
             return False
         else:
@@ -109,31 +116,35 @@ class Player():
         self.proto.start()
 
     def protocol(self):
-        while True:
-            question = self.host.get_classical(self.referee.host.host_id, wait=-1)[-1]
+        for _ in range(self.rounds):
+            question = get_next_classical(self.host, self.referee.host.host_id, wait=-1)
             question = int(question.content)
             resp = self.request_epr()
 
-            if resp is None:
-                ans = 1
+            # Without a shared EPR pair fall back to the optimal classical strategy
+            if not resp:
+                ans = 0
                 strategy = 'C'
             else:
-                ans = 1
+                ans = self.quantum_strategy(question)
                 strategy = 'Q'
 
             self.qubit = None
             self.host.send_classical(self.referee.host.host_id, str(ans) + ',' + strategy)
 
 class EPR_GEN():
-    def __init__(self):
-        self.host = Host('EPR_GEN')
+    def __init__(self, rounds=ROUNDS, backend=None):
+        self.host = Host('EPR_GEN', backend=backend)
         self.players = []
         self.proto = None
+        self.rounds = rounds
 
     def protocol(self):
-        while True:
+        for _ in range(self.rounds):
+            # Wait for a request from every player before distributing the pair
             for p in self.players:
-                self.host.get_classical(p.host.host_id, wait=-1)
+                get_next_classical(self.host, p.host.host_id, wait=-1)
+            self.distribute_epr_pairs()
 
     def distribute_epr_pairs(self):
         qubits = [Qubit(self.host) for p in self.players]
@@ -142,7 +153,7 @@ class EPR_GEN():
             qubits[0].cnot(q)
         
         for i, player in enumerate(self.players):
-            self.host.send_qubit(player, qubits[i])
+            self.host.send_qubit(player.host.host_id, qubits[i])
 
 
     def run(self):
@@ -153,16 +164,19 @@ class EPR_GEN():
         self.players.append(player)
 
 
-def main():
+def main(rounds=ROUNDS, backend=None):
+    """
+    Play *rounds* rounds of the CHSH game and return the number of wins.
+    """
     network = Network.get_instance()
 
     # Initializing host objects and the network
-    ref = Referee()
-    alice = Player(STRATEGY_A, 'Alice')
-    bob = Player(STRATEGY_B, 'Bob')
-    epr = EPR_GEN()
+    ref = Referee(rounds, backend)
+    alice = Player(STRATEGY_A, 'Alice', rounds, backend)
+    bob = Player(STRATEGY_B, 'Bob', rounds, backend)
+    epr = EPR_GEN(rounds, backend)
 
-    network.start()
+    network.start(backend=backend)
 
     # Add connections between referee and players in both directions
     ref.host.add_c_connection(alice.host.host_id)
@@ -209,5 +223,9 @@ def main():
     for hosts in [alice, bob, epr, ref]:
         hosts.proto.join()
 
+    print("Win percentage was: %.3f" % (ref.wins / rounds))
+    network.stop(True)
+    return ref.wins
+
 if __name__ == "__main__":
     main()
@@ -1,90 +1,164 @@
 #!/usr/bin/env python3
 from qunetsim.components import Host
 from qunetsim.components import Network
-from qunetsim.objects import Qubit
 from qunetsim.objects import Logger
+import random
+import block_codes
+from polling import get_next_classical, get_qubit, POLL_INTERVAL
+import qubit_pool
 
 # Introduction to Quantum Networks: Homework 1
 # Author: Kaustubh Venkatesh; 03765695
 # Set to False, to get more information
 Logger.DISABLED = True
 
-def sender_protocol(host, receiver):
-    secret = "It must be remembered that there is nothing more difficult to plan, more doubtful of success, nor more dangerous to manage, than the creation of a new system. For the initiator has the enmity of all who would profit by the preservation of the old institutions, and merely lukewarm defenders in those who would gain by the new ones."
+# Sender's verdict after checking the returned secret when resending
+ACK = "ACK"
+NACK = "NACK"
 
-    secret_bin = list(map(bin, bytearray(secret, 'utf-8')))
-    secret_bin = [x[2:].zfill(8) for x in secret_bin]
+SECRET = "It must be remembered that there is nothing more difficult to plan, more doubtful of success, nor more dangerous to manage, than the creation of a new system. For the initiator has the enmity of all who would profit by the preservation of the old institutions, and merely lukewarm defenders in those who would gain by the new ones."
 
-    # Sending the secret
+def send_bits(host, receiver, secret_bin, code=None):
+    """
+    Send every 8 bit character in *secret_bin*, block coded with *code*, and
+    return the number of qubits sent.
+    """
+    channel_uses = 0
     for character in secret_bin:
         print(f"{host.host_id}: sending a character: {character}")
+        if code is not None:
+            character = code.encode(character)
         for bit in character:
             # TODO: Create a qubit and encode the classical bit into it.
             # Note: a qubit is created in the state |0> by default
-            q = Qubit(host)
+            q = qubit_pool.new_qubit(host)
 
             # Excite qubit when the classical bit is '1'
-            if bit == '1':
+            if int(bit) == 1:
                 q.X()
             
             # TODO: Send the qubit to the receiver, make it await acknowledgment
             q_id, ack_arrived = host.send_qubit(receiver, q, await_ack = True)
-
+            channel_uses += 1
 
     # TODO: Send the classical message to the receiver
     # The content of the message should be "END"
     # The message signals the end of secret phrase transmission
     msg = "END"
     host.send_classical(receiver, msg, await_ack = True)
+    return channel_uses
 
-    # Secret Verify
-    # TODO: Receive classical message, which includes the secret
-    message = host.get_classical(receiver, wait = 5)
+def sender_protocol(host, receiver, secret=SECRET, code=None, attempts=1, stats=None):
+    secret_bin = list(map(bin, bytearray(secret, 'utf-8')))
+    secret_bin = [x[2:].zfill(8) for x in secret_bin]
+
+    # Sending the secret, resending all of it until it arrives intact
+    channel_uses = 0
+    for attempt in range(attempts):
+        channel_uses += send_bits(host, receiver, secret_bin, code)
+
+        # Secret Verify
+        # TODO: Receive classical message, which includes the secret
+        message = get_next_classical(host, receiver, wait = 5)
+
+        recv_secret = message.content if message is not None else None
+        success = recv_secret == secret
+        if attempts > 1:
+            host.send_classical(receiver, ACK if success else NACK, await_ack = True)
+        if success:
+            break
 
-    recv_secret = message[0].content
-    if recv_secret==secret:
-        print(f"{host.host_id}: Secret Exchange succeeded")
+    if stats is not None:
+        stats.update(channel_uses=channel_uses, attempts=attempt + 1, success=success)
+    if success:
+        print(f"{host.host_id}: Secret Exchange succeeded after {attempt + 1} attempt(s)")
         print(f"Secret: {secret}")
     else:
         print(f"{host.host_id}: Secret Exchange Failed")
         print(f"Secret sent; {secret}")
         print(f"Secret received: '{recv_secret}'")
-
-def receiver_protocol(host, sender):
+    print(f"{host.host_id}: goodput {8 * len(secret_bin) * success / channel_uses:.3f} "
+          f"payload bits per channel use")
+
+def receive_bits(host, sender, code=None, noise=0.0):
+    """
+    Receive qubits until the sender's END message, flipping each with
+    probability *noise* to model a bit flip channel, and decode them.
+    """
     secret_bits = []
+    char_len = block_codes.coded_length(code, 8)
+    end = False
     while True:
-        classical_message = host.get_classical(sender, wait=0)
-        if len(classical_message) > 0:
-            break
+        # Qubits are acknowledged on arrival, so once END is in they are all stored
+        if not end:
+            msg = get_next_classical(host, sender, wait=0)
+            end = msg is not None and msg.content == "END"
         # TODO: Get the qubit which was sent by the sender
-        # Use the get_data_qubit(sender, wait) method
-        # Set wait parameter to 5
-        q = host.get_qubit(sender, wait = 5)
+        q = get_qubit(host, sender, wait = POLL_INTERVAL)
 
         if q is None:
+            if end:
+                break
             continue
 
+        # Noisy channel
+        if noise > 0 and random.random() < noise:
+            q.X()
+
         # TODO: Measure the qubit and append it to the secret_bits list
-        m = q.measure()
+        m = qubit_pool.measure(q)
         secret_bits.append(m)
 
-        if len(secret_bits)%8 == 0:
-           sb = ["".join(map(str, secret_bits[i:i+8])) for i in range(0,len(secret_bits), 8)]
-           print(f"{host.host_id}: received a character: {sb[-1]}")
-
-
-    # Decoding the secret
-    secret_bits = ["".join(map(str, secret_bits[i:i+8])) for i in range(0,len(secret_bits), 8)]
-    print(f"{host.host_id} received the following bits:")
-    print("\n".join(" ".join(secret_bits[i:i+6]) for i in range(0,len(secret_bits), 6)))
-    secret_chars = [chr(int(s,2)) for s in secret_bits]
-    secret = "".join(secret_chars)
-
-    # Secret Verify
-    # TODO: Send the secret (variable secret) back to the sender for verification.
-    host.send_classical(sender, secret)
-
-def main():
+        if len(secret_bits) % char_len == 0:
+           print(f"{host.host_id}: received a character: {''.join(map(str, secret_bits[-char_len:]))}")
+
+    # Syndrome decode every block at once
+    if code is not None:
+        secret_bits = list(code.decode(secret_bits[:len(secret_bits) // code.n * code.n]))
+    return secret_bits
+
+def receiver_protocol(host, sender, code=None, noise=0.0, attempts=1):
+    for attempt in range(attempts):
+        secret_bits = receive_bits(host, sender, code, noise)
+
+        # Decoding the secret
+        secret_bits = ["".join(map(str, secret_bits[i:i+8])) for i in range(0,len(secret_bits), 8)]
+        print(f"{host.host_id} received the following bits:")
+        print("\n".join(" ".join(secret_bits[i:i+6]) for i in range(0,len(secret_bits), 6)))
+        secret_chars = [chr(int(s,2)) for s in secret_bits]
+        secret = "".join(secret_chars)
+
+        # Secret Verify
+        # TODO: Send the secret (variable secret) back to the sender for verification.
+        host.send_classical(sender, secret)
+
+        if attempts > 1:
+            verdict = get_next_classical(host, sender, wait = 10)
+            if verdict is None or verdict.content == ACK:
+                break
+
+def main(secret=SECRET, backend=None, pool_cap=None, code=None, noise=0.0, attempts=1,
+         stats=None):
+    """
+    Send *secret* from Alice to Bob one bit per qubit.
+
+    Parameters
+    ----------
+    stats : dict
+        If given, filled with the qubits sent (channel_uses), the attempts
+        made and whether the secret arrived intact (success)
+
+    Returns
+    -------
+    QubitPool
+        The sender's qubit pool, or None without *pool_cap*
+    """
+    if not secret:
+        raise Exception('The secret must not be empty')
+    if attempts < 1:
+        raise Exception('At least one attempt is needed')
+    if not 0 <= noise <= 1:
+        raise Exception('The noise rate must be a probability')
     # TODO: get the Network() instance
     network = None
     network = Network.get_instance()
@@ -94,15 +168,15 @@ def main():
     nodes = ['Alice', 'Bob']
 
     # TODO: start the network with the list of nodes
-    network.start()
+    network.start(backend=backend)
 
     # TODO: Configure the hosts:
     # 1. Create host instances,
     # 2. Create connections between hosts,
     # 3. Start all of the hosts instances,
     # 4. Add hosts to the network.
-    host_alice = Host(nodes[0])
-    host_bob = Host(nodes[1])
+    host_alice = Host(nodes[0], backend=backend)
+    host_bob = Host(nodes[1], backend=backend)
 
     host_alice.add_connection(nodes[1])
     host_bob.add_connection(nodes[0])
@@ -110,6 +184,11 @@ def main():
     host_alice.start()
     host_bob.start()
 
+    # Recycle the measured qubits on the sender side
+    pool = None
+    if pool_cap is not None:
+        pool = qubit_pool.register(host_alice, pool_cap)
+
     network.add_host(host_alice)
     network.add_host(host_bob)
 
@@ -122,14 +201,16 @@ def main():
     # 2. Apply receiver protocol to the second host.
     # run_protocol() method returns a thread object. Store both threads as some variable
     # and join them.
-    p1 = host_alice.run_protocol(sender_protocol, (nodes[1], ))
-    p2 = host_bob.run_protocol(receiver_protocol, (nodes[0], ))
+    code = block_codes.get_code(code)
+    p1 = host_alice.run_protocol(sender_protocol, (nodes[1], secret, code, attempts, stats))
+    p2 = host_bob.run_protocol(receiver_protocol, (nodes[0], code, noise, attempts))
 
     p1.join()
     p2.join()
 
     # TODO: Finally stop the network
     network.stop(True)
+    return pool
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
 from binary_string import binary as secret_message
 from qunetsim import Host, Network, Logger, Qubit
 import random
+import time
+from collections import deque
+import qubit_pool
+from polling import get_next_classical, get_qubit, POLL_INTERVAL
 
 Logger.DISABLED = True
 IS_EPR = '1'
@@ -11,8 +15,70 @@ DATA_FRAME = 8
 assert len(secret_message) % DATA_FRAME == 0
 
 EPR_FRAME = 4
-cur_location = 0
-p = 0.75
+SEND_PROBABILITY = 0.75
+
+# Classical message a sender sends after its last frame
+END = 'END'
+
+# How long the receiver waits for the rest of a frame in seconds
+FRAME_TIMEOUT = 10
+
+
+class Session():
+    """
+    Frame state of one stream between a sender and a receiver. Each side keeps
+    its own Session per peer, so a host can run several streams at once.
+
+    The EPR halves shared with the peer are kept in the session rather than
+    in the host's qubit storage. QuNetSim stores EPR halves and data qubits
+    from a peer in one list and rotates it when looking for an EPR half, which
+    reorders data qubits that queue up while the receiver serves other peers.
+
+    Each side counts the EPR pairs it shares with the peer (eprs_created) and
+    the ones spent on dense coded data (eprs_consumed). A receiving session is
+    marked failed when the peer stops sending in the middle of a frame.
+
+    Parameters
+    ----------
+    message : str
+        The binary string to send, empty on the receiving side
+    p : float
+        Probability that a data frame is ready to send in a time slot
+    data_frame : int
+        Bits per data frame
+    epr_frame : int
+        EPR pairs per EPR frame
+    """
+
+    def __init__(self, message=secret_message, p=SEND_PROBABILITY, data_frame=DATA_FRAME,
+                 epr_frame=EPR_FRAME):
+        if data_frame % 2 or len(message) % data_frame:
+            raise Exception('The data frame length must be even and divide the secret length')
+        if epr_frame % (data_frame // 2):
+            raise Exception('The EPR frame length must be a multiple of half the data frame')
+        self.message = message
+        self.p = p
+        self.data_frame = data_frame
+        self.epr_frame = epr_frame
+        self.cur_location = 0
+        self.received = ''
+        self.channel_uses = 0
+        self.done = False
+        self.failed = False
+        self.eprs = deque()
+        self.eprs_created = 0
+        self.eprs_consumed = 0
+
+    def needs_epr_frame(self) -> bool:
+        """Whether the rest of the message can use up another EPR frame."""
+        remaining = len(self.message) - self.cur_location
+        return len(self.eprs) + self.epr_frame <= remaining // 2
+
+    @property
+    def stats(self) -> dict:
+        return {'bits': len(self.received), 'channel_uses': self.channel_uses,
+                'eprs_created': self.eprs_created, 'eprs_consumed': self.eprs_consumed,
+                'failed': self.failed}
 
 def dense_encode(q: Qubit, bits: str):
     """
@@ -71,8 +137,8 @@ def dense_decode(stored_epr_half: Qubit, received_qubit: Qubit) -> str:
     stored_epr_half.cnot(received_qubit)
     stored_epr_half.H()
 
-    q1 = stored_epr_half.measure()
-    q2 = received_qubit.measure()
+    q1 = qubit_pool.measure(stored_epr_half)
+    q2 = qubit_pool.measure(received_qubit)
     meas = str(q1) + str(q2)
     return meas
 
@@ -123,13 +189,13 @@ def decode_qubit(q: Qubit) -> str:
     str
         One bit with the qubit measurement result.
     """
-    meas = q.measure()
+    meas = qubit_pool.measure(q)
     return str(meas)
 
 
-def get_next_message() -> str:
+def get_next_message(session: Session) -> str:
     """
-    With some probability, retreive *DATA_FRAME* bits of the message to transmit.
+    With some probability, retreive *data_frame* bits of the session's message to transmit.
     When there are no more bits to transmit False is returned.
 
     Returns
@@ -137,19 +203,18 @@ def get_next_message() -> str:
     str
         A 1 or 2 bit message with probability *p*, -1 with *1 - p*, or False.
     """
-    global cur_location
-    if len(secret_message) == cur_location:
+    if len(session.message) == session.cur_location:
         return False
 
-    should_send = random.random() <= p
+    should_send = random.random() <= session.p
     if should_send:
-        msg = secret_message[cur_location: cur_location + DATA_FRAME]
-        cur_location += DATA_FRAME
+        msg = session.message[session.cur_location: session.cur_location + session.data_frame]
+        session.cur_location += session.data_frame
         return msg
     return -1
 
 
-def decode_secret_message(binary_message: str):
+def decode_secret_message(binary_message: str, sender=None) -> str:
     """
     Decode the ASCII values of *binary_message*.
 
@@ -157,110 +222,264 @@ def decode_secret_message(binary_message: str):
     ----------
     binary_message : str
         The binary string to decode.
+    sender : str
+        The ID of the host the message came from, for the printout
+
+    Returns
+    -------
+    str
+        The decoded text
     """
-    global p
     binary_int = int(binary_message, 2)
-    byte_number = binary_int.bit_length() + 7 // 8
+    byte_number = len(binary_message) // 8
     binary_array = binary_int.to_bytes(byte_number, "big")
     ascii_text = binary_array.decode()
-    print(f'Secret message:\n{ascii_text}')
+    source = '' if sender is None else f' from {sender}'
+    print(f'Secret message{source}:\n{ascii_text}')
+    return ascii_text
 
 
-def sender_protocol(host, receiver):
-    cur_message = get_next_message()
+def sender_protocol(host, receiver, session=None):
+    if session is None:
+        session = Session()
+
+    def send(qubit):
+        session.channel_uses += 1
+        return host.send_qubit(receiver, qubit, await_ack = True)
+
+    cur_message = get_next_message(session)
     while cur_message:
-        leading_qubit = Qubit(host)
+        # Leave the slot idle rather than make EPR pairs that would go unused
+        if cur_message == -1 and not session.needs_epr_frame():
+            cur_message = get_next_message(session)
+            continue
+        leading_qubit = qubit_pool.new_qubit(host)
 
         # Hint: Refer to the constants above for how to transmit the frames
         # Hint: Use the `await_ack=True` flag when sending qubits to keep
         #       the sender and receiver in sync
         if cur_message == -1:
             # TODO: Fill in the logic for when there is no message to send
-            # Hint: You can use host.add_epr(receiver, qubit) to store EPR halfs
-            #       after generating them
+            # Hint: EPR halves are stored in the session, in the order they are sent
             leading_qubit.X()
-            q_id, ack_arrived = host.send_qubit(receiver, leading_qubit, await_ack = True)
-            for i in range(EPR_FRAME):
-                qubit = Qubit(host)
-                target = Qubit(host)
+            q_id, ack_arrived = send(leading_qubit)
+            for i in range(session.epr_frame):
+                qubit = qubit_pool.new_qubit(host)
+                target = qubit_pool.new_qubit(host)
                 qubit.H()
                 qubit.cnot(target=target)
-                host.add_epr(receiver, qubit)
-                host.send_qubit(receiver, target, await_ack=True)
+                session.eprs.append(qubit)
+                session.eprs_created += 1
+                send(target)
 
         else:
             leading_qubit.I()
-            q_id, ack_arrived = host.send_qubit(receiver, leading_qubit, await_ack = True)
+            q_id, ack_arrived = send(leading_qubit)
             # TODO: Fill in the logic for when there is a message to send
-            # Hint: You can use host.shares_epr(receiver) to determine how the
-            #       message should be encoded.
+            # Hint: A non-empty session.eprs determines how the message
+            #       should be encoded.
             # Hint: Use the encoding methods from above.
-            if host.shares_epr(receiver):
+            if session.eprs:
                 for i in range(0, len(cur_message), 2):
-                    epr = host.get_epr(receiver)
+                    epr = session.eprs.popleft()
+                    session.eprs_consumed += 1
                     encoded_qubit = dense_encode(epr, str(cur_message[i] + cur_message[i+1]))
-                    q_id, ack_arrived = host.send_qubit(receiver, encoded_qubit, await_ack=True)
+                    q_id, ack_arrived = send(encoded_qubit)
             else:
                 for bit in cur_message:
-                    qubit = Qubit(host)
+                    qubit = qubit_pool.new_qubit(host)
                     encoded_qubit = encode_qubit(qubit, bit)
-                    q_id, ack_arrived = host.send_qubit(receiver, encoded_qubit, await_ack = True)
-        cur_message = get_next_message()
-
-
-def receiver_protocol(host, sender):
-    binary_message = ''
-    while True:
-        received_qubit = host.get_data_qubit(sender, wait=10)
-        if received_qubit is None:
-            break
-        # TODO: Retreive the header bit
-        header_bit = received_qubit.measure()
-        if str(header_bit) == IS_EPR:
-            # TODO: Fill in the logic for what to do when the header qubit
-            #       indicates EPR qubits arriving. Hint: EPR_FRAME defines
-            #       how many EPR pair halves will arrive.
-            for i in range(EPR_FRAME):
-                shared_epr = host.get_qubit(sender, wait = 11)
-                host.add_epr(sender, shared_epr)
-                
+                    q_id, ack_arrived = send(encoded_qubit)
+        cur_message = get_next_message(session)
+
+    # Every qubit is acknowledged, so the receiver has them all once END arrives
+    host.send_classical(receiver, END, await_ack = True)
+
+
+def receive_frame(host, sender, session, received_qubit):
+    """
+    Receive the rest of the frame from *sender* whose header qubit is
+    *received_qubit*, appending any data bits to *session.received*. If the
+    rest of the frame does not arrive in time the session is marked failed.
+    """
+    # TODO: Retreive the header bit
+    header_bit = qubit_pool.measure(received_qubit)
+    if str(header_bit) == IS_EPR:
+        # TODO: Fill in the logic for what to do when the header qubit
+        #       indicates EPR qubits arriving. Hint: EPR_FRAME defines
+        #       how many EPR pair halves will arrive.
+        for i in range(session.epr_frame):
+            shared_epr = get_qubit(host, sender, wait = FRAME_TIMEOUT)
+            if shared_epr is None:
+                session.failed = True
+                return
+            session.eprs.append(shared_epr)
+            session.eprs_created += 1
+
+    else:
+        # TODO: Fill in the logic for what to do when the header qubit
+        #       indicates data is arriving.
+        # Hint: A non-empty session.eprs determines how the message
+        #       should be decoded
+        if session.eprs:
+            for i in range(session.data_frame // 2):
+                qubit = get_qubit(host, sender, wait = FRAME_TIMEOUT)
+                if qubit is None:
+                    session.failed = True
+                    return
+                shared_epr = session.eprs.popleft()
+                session.eprs_consumed += 1
+                decoded = dense_decode(shared_epr, qubit)
+                session.received += decoded
         else:
-            # TODO: Fill in the logic for what to do when the header qubit
-            #       indicates data is arriving.
-            # Hint: You can use host.shares_epr(sender) to determine how the
-            #       message should be decoded
-            if host.shares_epr(sender):
-                for i in range(EPR_FRAME):
-                    shared_epr = host.get_epr(sender)
-                    qubit = host.get_qubit(sender, wait = 1)
-                    decoded = dense_decode(shared_epr, qubit)
-                    binary_message += decoded
-            else:
-                for i in range(DATA_FRAME):
-                    qubit = host.get_qubit(sender, wait = 10)
-                    decoded = decode_qubit(qubit)
-                    binary_message += decoded
-    decode_secret_message(binary_message)
+            for i in range(session.data_frame):
+                qubit = get_qubit(host, sender, wait = FRAME_TIMEOUT)
+                if qubit is None:
+                    session.failed = True
+                    return
+                decoded = decode_qubit(qubit)
+                session.received += decoded
 
 
+def receiver_protocol(host, sender, session=None):
+    if session is None:
+        session = Session('')
+    multi_receiver_protocol(host, {sender: session})
+
+
+def multi_receiver_protocol(host, sessions):
+    """
+    Receive the streams of all senders in *sessions* (sender ID to Session)
+    at the same time, demultiplexing the frames by their source. Each sender
+    shares its own pool of EPR pairs with the receiver, kept in its session.
+    A sender whose frame breaks off is dropped without stopping the others.
+    """
+    active = list(sessions)
+    while active:
+        idle = True
+        for sender in list(active):
+            session = sessions[sender]
+            if not session.done:
+                msg = get_next_classical(host, sender, wait=0)
+                session.done = msg is not None and msg.content == END
+            received_qubit = host.get_qubit(sender, wait=0)
+            if received_qubit is not None:
+                idle = False
+                receive_frame(host, sender, session, received_qubit)
+                if session.failed:
+                    active.remove(sender)
+            elif session.done:
+                active.remove(sender)
+        if idle:
+            time.sleep(POLL_INTERVAL)
+
+    for sender, session in sessions.items():
+        if session.failed:
+            print(f'Stream from {sender} broke off after {len(session.received)} bits')
+            continue
+        decode_secret_message(session.received, sender if len(sessions) > 1 else None)
+
+
+def main(send_probability=SEND_PROBABILITY, data_frame=DATA_FRAME, epr_frame=EPR_FRAME,
+         backend=None, pool_cap=None, delay=None):
+    sender_session = Session(secret_message, send_probability, data_frame, epr_frame)
+    receiver_session = Session('', send_probability, data_frame, epr_frame)
 
-def main():
     network = Network.get_instance()
-    network.start()
+    network.start(backend=backend)
+    if delay is not None:
+        network.delay = delay
 
-    host_A = Host('A')
+    host_A = Host('A', backend=backend)
     host_A.add_connection('B')
     host_A.start()
-    host_B = Host('B')
+    host_B = Host('B', backend=backend)
     host_B.add_connection('A')
     host_B.start()
 
+    # Recycle the measured qubits on the sender side
+    pool = None
+    if pool_cap is not None:
+        pool = qubit_pool.register(host_A, pool_cap)
+
     network.add_hosts([host_A, host_B])
 
-    t1 = host_A.run_protocol(sender_protocol, ('B',))
-    t2 = host_B.run_protocol(receiver_protocol, ('A',), blocking=True)
+    t1 = host_A.run_protocol(sender_protocol, ('B', sender_session))
+    t2 = host_B.run_protocol(receiver_protocol, ('A', receiver_session), blocking=True)
+
+    network.stop(True)
+    return pool
+
+
+def multi_main(senders=2, send_probability=SEND_PROBABILITY, data_frame=DATA_FRAME,
+               epr_frame=EPR_FRAME, backend=None, delay=None, pool_cap=None):
+    """
+    Stream the secret message from *senders* hosts to one receiver at once.
+
+    Returns
+    -------
+    dict
+        Payload bits delivered, wall time, aggregate throughput in bits per
+        second, channel uses, and whether every stream arrived intact. Under
+        'peers', the same per sender together with the EPR pairs it created
+        and consumed, and its qubit pool counters when *pool_cap* is given.
+    """
+    network = Network.get_instance()
+    network.start(backend=backend)
+    if delay is not None:
+        network.delay = delay
+
+    sender_ids = ['S%d' % i for i in range(senders)]
+    receiver = Host('R', backend=backend)
+    hosts = []
+    for sender_id in sender_ids:
+        host = Host(sender_id, backend=backend)
+        host.add_connection('R')
+        receiver.add_connection(sender_id)
+        hosts.append(host)
+    for host in hosts + [receiver]:
+        host.start()
+    network.add_hosts(hosts + [receiver])
+
+    # Recycle the measured qubits on the sender side
+    pools = {}
+    if pool_cap is not None:
+        pools = {host.host_id: qubit_pool.register(host, pool_cap) for host in hosts}
+
+    sender_sessions = {s: Session(secret_message, send_probability, data_frame, epr_frame)
+                       for s in sender_ids}
+    receiver_sessions = {s: Session('', send_probability, data_frame, epr_frame)
+                         for s in sender_ids}
+
+    start = time.perf_counter()
+    threads = [host.run_protocol(sender_protocol, ('R', sender_sessions[host.host_id]))
+               for host in hosts]
+    receiver.run_protocol(multi_receiver_protocol, (receiver_sessions,), blocking=True)
+    elapsed = time.perf_counter() - start
+    for t in threads:
+        t.join()
 
     network.stop(True)
+    peers = {}
+    for s in sender_ids:
+        sent, received = sender_sessions[s], receiver_sessions[s]
+        peer = received.stats
+        peer.update(channel_uses=sent.channel_uses, eprs_created=sent.eprs_created,
+                    eprs_consumed=sent.eprs_consumed, intact=received.received == secret_message)
+        if s in pools:
+            peer['pool'] = pools[s].stats
+        peers[s] = peer
+
+    bits = sum(peer['bits'] for peer in peers.values())
+    return {
+        'senders': senders,
+        'bits': bits,
+        'seconds': elapsed,
+        'throughput': bits / elapsed,
+        'channel_uses': sum(peer['channel_uses'] for peer in peers.values()),
+        'intact': all(peer['intact'] for peer in peers.values()),
+        'peers': peers,
+    }
 
 if __name__ == '__main__':
     main()
@@ -2,7 +2,7 @@ import time
 from qunetsim.components.host import Host
 from qunetsim.components.network import Network
 import random
-import numpy as np
+import angle_optimizer
 
 wins = 0
 
@@ -63,7 +63,7 @@ def classical_player(host, ref):
     host.send_classical(ref, a_i, no_ack=True)
 
 
-def quantum_player(host, ref, angle):
+def quantum_player(host, ref, params):
     # Reset the classical message buffer
     host.empty_classical()
 
@@ -77,56 +77,48 @@ def quantum_player(host, ref, angle):
     x = host.get_classical(ref, wait=10)[0].content
     print('Player %s: got classical message %d' % (host.host_id, x))
 
-    # TODO: Use the correct unitary according to the optimal quantum strategy
-    # Hint: rotation operations can be performed on a qubit using q.rx(angle), q.ry(angle), q.rz(angle)
-    # Perform the correct unitary operation using rotation unitaries
+    # Perform this player's (rz, ry, rz) rotations for the question, see angle_optimizer
     # To use custom gates instead of the unitary rotations, uncomment the call to the custom function and comment the unitary rotation calls
-    if x == 0:
-        a = np.exp(1j * (np.pi/2 + angle))
-        gamma = -(np.pi/2 + angle)
-    else:
-        a = np.exp(1j * angle)
-        gamma = -angle
+    rz_in, ry_mid, rz_out = params[x]
 
-    u = (1 / np.sqrt(2)) * np.array([[a, 1], [-1, 1 / a]])
+    # u = angle_optimizer.unitaries(params[x])
     # q.custom_gate(u)
 
     # Using the built-in unitary rotation operators instead of the defined unitary for the quantum strategy
-    q.rz(gamma)
-    q.ry(-np.pi/2)
-    q.rz(gamma)
+    q.rz(rz_in)
+    q.ry(ry_mid)
+    q.rz(rz_out)
 
     host.send_classical(ref, q.measure(), no_ack=True)
 
-def main():
+def main(n=8, plays=50, strategy='q', backend=None, params=None):
+    """
+    Play *plays* rounds of the *n* player game with the given *strategy*
+    ('q' for quantum, 'c' for classical) and return the number of wins.
+    The quantum players use *params*, shape (n, 2, 3), or else the optimal
+    strategy from the angle_optimizer lookup table.
+    """
+    global wins
+    wins = 0
+
+    ids = 'ABCDEFGHIJKLMNOP'
+    if not 1 <= n <= len(ids):
+        raise Exception("The game needs between 1 and %d players" % len(ids))
+
     # Get and start the network
     network = Network.get_instance()
-    network.start()
+    network.start(backend=backend)
     network.delay = 0.0
 
-    ids = 'ABCDEFGHIJKLMNOP'
     players = []
 
     # Initiate the referee host
-    ref = Host('Ref')
+    ref = Host('Ref', backend=backend)
     ref.start()
 
-    # Select the strategy for the simulation
-    # classical
-    # strategy = 'c'
-
-    # quantum
-    strategy = 'q'
-
-    # Number of players
-    n = 8
-
-    if n > len(ids):
-        raise Exception("Not enough IDs")
-
     # Add the players to the network
     for i in range(n):
-        host = Host(ids[i])
+        host = Host(ids[i], backend=backend)
         host.add_connection('Ref')
         ref.add_connection(ids[i])
         players.append(host)
@@ -136,12 +128,12 @@ def main():
     network.add_hosts(players)
     network.add_host(ref)
 
-    # How many times to play the game
-    plays = 50
-
-    # TODO: Find the correct angle for the number of players
-    # Calculate the angle for the players
-    angle = ((((2 * n) + 1) % 8) * np.pi)/(4 * n)
+    # Look up the optimal per player angles for the number of players
+    # (the hand derived uniform angle only wins for an even n)
+    if strategy == 'q' and params is None:
+        params, p_quantum = angle_optimizer.optimal_params(n)
+    elif strategy == 'q':
+        p_quantum = float(angle_optimizer.win_probability(params))
 
     # Small optimization for classical case
     if strategy == 'c':
@@ -152,9 +144,9 @@ def main():
     # Run the game
     for i in range(plays):
         print("Game %d starting" % (i + 1))
-        for player in players:
+        for j, player in enumerate(players):
             if strategy == 'q':
-                player.run_protocol(quantum_player, (ref.host_id, angle))
+                player.run_protocol(quantum_player, (ref.host_id, params[j]))
             else:
                 player.run_protocol(classical_player, (ref.host_id,))
 
@@ -163,13 +155,14 @@ def main():
         print("Game %d ended" % (i + 1))
 
     if strategy == 'q':
-        p = 0.5 + (1 / (2 * np.sqrt(2)))
+        p = p_quantum
     else:
         p = 0.5 + (1 / (2 ** ((n + 1) / 2)))
 
     print("Win percentage was: %.3f" % (wins / plays))
     print("Optimal is %.3f" % p)
     network.stop(True)
+    return wins
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,65 @@
+import time
+
+# How often to look for a new classical message while waiting
+POLL_INTERVAL = 0.005
+
+
+def get_next_classical(host, sender_id, wait=-1):
+    """
+    Get the next unread classical message *host* received from *sender_id*.
+
+    QuNetSim's Host.get_next_classical does not mark a message as read when it
+    arrives while the call is blocked waiting, so the following call returns
+    it again. Only the non-blocking lookup advances the read position, so this
+    polls it instead.
+
+    Parameters
+    ----------
+    host : Host
+        The receiving host
+    sender_id : str
+        The ID of the sender
+    wait : float
+        How long to wait for a message in seconds, -1 to wait forever
+
+    Returns
+    -------
+    Message
+        The message, or None if none arrived in time.
+    """
+    deadline = None if wait == -1 else time.time() + wait
+    while True:
+        msg = host.get_next_classical(sender_id, wait=0)
+        if msg is not None or (deadline is not None and time.time() >= deadline):
+            return msg
+        time.sleep(POLL_INTERVAL)
+
+
+def get_qubit(host, sender_id, wait=-1):
+    """
+    Get the next data qubit *host* received from *sender_id*.
+
+    A Host.get_qubit call that times out leaves its request registered in
+    QuNetSim's quantum storage, and that request swallows the next qubit to
+    arrive. This polls the non-blocking lookup instead.
+
+    Parameters
+    ----------
+    host : Host
+        The receiving host
+    sender_id : str
+        The ID of the sender
+    wait : float
+        How long to wait for a qubit in seconds, -1 to wait forever
+
+    Returns
+    -------
+    Qubit
+        The qubit, or None if none arrived in time.
+    """
+    deadline = None if wait == -1 else time.time() + wait
+    while True:
+        q = host.get_qubit(sender_id, wait=0)
+        if q is not None or (deadline is not None and time.time() >= deadline):
+            return q
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,154 @@
+from threading import Lock
+from qunetsim.objects import Qubit
+
+# Default number of idle qubits a pool keeps around for reuse
+DEFAULT_CAP = 1024
+
+# Pools by the ID of the host that owns them
+_pools = {}
+
+# The pool each qubit handed out by a pool belongs to, by qubit ID
+_owners = {}
+
+
+class QubitPool():
+    """
+    Recycles the qubits a host sends one bit at a time.
+
+    The pool records every qubit it hands out, so the receiver can return a
+    measured qubit to the pool it came from. QuNetSim moves a qubit to the
+    receiving host on delivery, so the pool takes ownership back, resets it
+    to |0> and hands it out again instead of allocating a new one in the
+    backend.
+
+    Parameters
+    ----------
+    host : Host
+        The host that owns the pooled qubits
+    cap : int
+        How many idle qubits to keep. Qubits returned to a full pool are
+        released from the backend. A cap of 0 disables reuse but still counts.
+    """
+
+    def __init__(self, host, cap=DEFAULT_CAP):
+        if cap < 0:
+            raise Exception('Pool cap must not be negative')
+        self.host = host
+        self.cap = cap
+        self._free = []
+        self._lock = Lock()
+        self.allocated = 0
+        self.reused = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def get(self) -> Qubit:
+        """
+        Get a qubit in the state |0>, reusing an idle one when available.
+
+        Returns
+        -------
+        Qubit
+            A qubit owned by the pool's host
+        """
+        with self._lock:
+            if self._free:
+                self.reused += 1
+                q = self._free.pop()
+            else:
+                self.allocated += 1
+                q = None
+        if q is None:
+            q = Qubit(self.host)
+        _owners[q.id] = self
+        return q
+
+    def put(self, q: Qubit, value: int) -> bool:
+        """
+        Return a qubit that was measured non-destructively with result *value*.
+
+        Parameters
+        ----------
+        q : Qubit
+            The measured qubit
+        value : int
+            The measurement result, i.e. the basis state the qubit is in
+
+        Returns
+        -------
+        bool
+            True if the qubit was kept for reuse, False if it was released.
+        """
+        with self._lock:
+            keep = len(self._free) < self.cap
+            if not keep:
+                self.discarded += 1
+        if not keep:
+            q.release()
+            return False
+
+        # Delivery made the receiver the qubit's host
+        q.host = self.host
+        if value == 1:
+            q.X()
+        q.blocked = False
+        with self._lock:
+            self.recycled += 1
+            self._free.append(q)
+        return True
+
+    def clear(self):
+        """Release all idle qubits from the backend."""
+        with self._lock:
+            free, self._free = self._free, []
+        for q in free:
+            q.release()
+        for q_id, pool in list(_owners.items()):
+            if pool is self:
+                del _owners[q_id]
+
+    @property
+    def stats(self) -> dict:
+        return {'allocated': self.allocated, 'reused': self.reused,
+                'recycled': self.recycled, 'discarded': self.discarded}
+
+
+def register(host, cap=DEFAULT_CAP) -> QubitPool:
+    """Create the qubit pool for *host*, replacing any previous one."""
+    unregister(host.host_id)
+    pool = QubitPool(host, cap)
+    _pools[host.host_id] = pool
+    return pool
+
+
+def unregister(host_id):
+    """Remove the pool of the host with ID *host_id* and release its qubits."""
+    pool = _pools.pop(host_id, None)
+    if pool is not None:
+        pool.clear()
+
+
+def get_pool(host_id):
+    """Return the pool of the host with ID *host_id*, or None."""
+    return _pools.get(host_id)
+
+
+def new_qubit(host) -> Qubit:
+    """Get a |0> qubit for *host*, from its pool if it has one."""
+    pool = _pools.get(host.host_id)
+    if pool is None:
+        return Qubit(host)
+    return pool.get()
+
+
+def measure(q: Qubit) -> int:
+    """
+    Measure *q* and recycle it into the pool it came from. For a qubit that
+    no pool handed out this is a plain destructive measurement.
+    """
+    pool = _owners.pop(q.id, None)
+    if pool is None:
+        return q.measure()
+    value = q.measure(non_destructive=True)
+    pool.put(q, value)
+    return value
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+#
+#  Command line entry point for the games and transports in this repository
+#
+#  Every experiment module pulls in qunetsim and NumPy (and plot_code also
+#  matplotlib) at import time, so they are only imported inside the
+#  subcommand that needs them. `--help` and argument errors never touch them.
+#
+
+import argparse
+import importlib
+import random
+import sys
+
+# Names accepted by --backend, mapped to the qunetsim.backends class
+BACKENDS = {
+    'eqsn': 'EQSNBackend',
+    'projectq': 'ProjectQBackend',
+    'qutip': 'QuTipBackend',
+    'cqc': 'CQCBackend',
+}
+
+# mermin-ardehali names its players A to P
+MAX_PLAYERS = 16
+
+
+def make_backend(name):
+    """
+    Instantiate the qunetsim backend called *name*, or return None to use the
+    qunetsim default.
+    """
+    if name is None:
+        return None
+    backends = importlib.import_module('qunetsim.backends')
+    return getattr(backends, BACKENDS[name])()
+
+
+def backend_installed(name):
+    """Whether the installed qunetsim provides the backend called *name*."""
+    backends = importlib.import_module('qunetsim.backends')
+    return hasattr(backends, BACKENDS[name])
+
+
+def seed_everything(seed):
+    """Seed the Python and NumPy generators used by the simulations."""
+    if seed is None:
+        return
+    random.seed(seed)
+    import numpy as np
+    np.random.seed(seed)
+
+
+def split_rounds(rounds, workers):
+    """Split *rounds* into *workers* shares that differ by at most one."""
+    workers = max(1, min(workers, rounds))
+    return [rounds // workers + (1 if i < rounds % workers else 0) for i in range(workers)]
+
+
+def _play(module, seed, backend, kwargs):
+    """Run one worker's share of a game and return the number of wins."""
+    seed_everything(seed)
+    game = importlib.import_module(module)
+    return game.main(backend=make_backend(backend), **kwargs)
+
+
+def run_game(module, rounds_key, args, **kwargs):
+    """
+    Play *args.rounds* rounds of the game in *module*, spread across
+    *args.workers* processes. Each process owns its own Network singleton.
+    """
+    shares = split_rounds(args.rounds, args.workers)
+    seeds = [None if args.seed is None else args.seed + i for i in range(len(shares))]
+    jobs = [(module, seeds[i], args.backend, dict(kwargs, **{rounds_key: share}))
+            for i, share in enumerate(shares)]
+
+    if len(jobs) == 1:
+        wins = _play(*jobs[0])
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            wins = sum(pool.map(_play, *zip(*jobs)))
+
+    print("Total wins: %d/%d (%.3f)" % (wins, args.rounds, wins / args.rounds))
+    return wins
+
+
+def cmd_mermin(args):
+    if args.strategy == 'q':
+        # Fill the lookup table here, not in every worker at once
+        importlib.import_module('angle_optimizer').optimal_params(args.players)
+    return run_game('mermin-ardehali', 'plays', args, n=args.players, strategy=args.strategy)
+
+
+def cmd_chsh(args):
+    return run_game('chsh', 'rounds', args)
+
+
+def cmd_hw1(args):
+    seed_everything(args.seed)
+    hw1 = importlib.import_module('hw1_todo')
+    secret = hw1.SECRET if args.secret is None else args.secret
+    hw1.main(secret, backend=make_backend(args.backend), pool_cap=args.pool_cap,
+             code=args.code, noise=args.noise, attempts=args.attempts)
+
+
+def cmd_hw4(args):
+    seed_everything(args.seed)
+    hw4 = importlib.import_module('hw4_todo')
+    if args.senders > 1:
+        stats = hw4.multi_main(args.senders, args.p, args.data_frame, args.epr_frame,
+                               backend=make_backend(args.backend), delay=args.delay,
+                               pool_cap=args.pool_cap)
+        print("%(senders)d senders: %(bits)d bits in %(seconds).2f s, "
+              "%(throughput).1f bits/s, intact: %(intact)s" % stats)
+        for sender, peer in stats['peers'].items():
+            print("  %s: %d bits, %d channel uses, %d EPR pairs created, %d consumed, "
+                  "intact: %s" % (sender, peer['bits'], peer['channel_uses'],
+                                  peer['eprs_created'], peer['eprs_consumed'], peer['intact']))
+        return
+    hw4.main(args.p, args.data_frame, args.epr_frame, backend=make_backend(args.backend),
+             pool_cap=args.pool_cap, delay=args.delay)
+
+
+def cmd_repeater(args):
+    seed_everything(args.seed)
+    repeater = importlib.import_module('repeater')
+    stats = repeater.main(args.hops, args.topology, args.data_frame, args.epr_frame,
+                          backend=make_backend(args.backend), delay=args.delay)
+    print("%(hops)d hops: EPR latency %(epr_latency_mean).4f s (max %(epr_latency_max).4f s), "
+          "goodput %(goodput).1f bits/s, %(bits_per_channel_use).3f bits per channel use, "
+          "intact: %(intact)s" % stats)
+
+
+def cmd_angles(args):
+    optimizer = importlib.import_module('angle_optimizer')
+    table = optimizer.load_table()
+    changed = False
+    for n in args.players:
+        if args.recompute or str(n) not in table:
+            params, p, converged = optimizer.optimize(n, restarts=args.restarts,
+                                                      steps=args.steps, seed=args.seed)
+            if not converged:
+                print("n=%d: warning: search did not converge in %d steps (win probability "
+                      "%.6f), not stored, try more --steps or --restarts" % (n, args.steps, p))
+                continue
+            if optimizer.store(table, n, params, p):
+                changed = True
+            else:
+                print("n=%d: found %.6f, keeping the stored entry" % (n, p))
+        print("n=%d: win probability %.6f" % (n, table[str(n)]['win_probability']))
+    if changed:
+        optimizer.save_table(table)
+
+
+def cmd_plot(args):
+    importlib.import_module('plot_code').main()
+
+
+def add_common(parser, workers=False, pool=False):
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=None,
+                        help='qunetsim simulation backend (default: eqsn)')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    if workers:
+        parser.add_argument('--rounds', type=int, default=50, help='number of rounds to play')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='number of processes the rounds are spread across')
+    if pool:
+        parser.add_argument('--pool-cap', type=int, default=None,
+                            help='recycle measured qubits, keeping at most this many idle')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='qunets',
+                                     description='Quantum network games and transports.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('mermin', help='n-player Mermin-Ardehali game')
+    p.add_argument('-n', '--players', type=int, default=8, help='number of players')
+    p.add_argument('--strategy', choices=['q', 'c'], default='q',
+                   help='quantum (q) or classical (c) strategy')
+    add_common(p, workers=True)
+    p.set_defaults(func=cmd_mermin)
+
+    p = sub.add_parser('chsh', help='two-player CHSH game')
+    add_common(p, workers=True)
+    p.set_defaults(func=cmd_chsh)
+
+    p = sub.add_parser('hw1', help='one classical bit per qubit transport')
+    p.add_argument('--secret', default=None, help='message to transfer')
+    p.add_argument('--code', default='none',
+                   help="block code applied to the bit stream: none, hamming or rep<n>")
+    p.add_argument('--noise', type=float, default=0.0,
+                   help='probability that the channel flips a qubit')
+    p.add_argument('--attempts', type=int, default=1,
+                   help='resend the whole message until it verifies, at most this often')
+    add_common(p, pool=True)
+    p.set_defaults(func=cmd_hw1)
+
+    p = sub.add_parser('hw4', help='superdense coding transport')
+    p.add_argument('--p', type=float, default=0.75,
+                   help='probability that a data frame is ready to send')
+    p.add_argument('--data-frame', type=int, default=8, help='bits per data frame')
+    p.add_argument('--epr-frame', type=int, default=4, help='EPR pairs per EPR frame')
+    p.add_argument('--senders', type=int, default=1,
+                   help='stream from this many senders to one receiver at once')
+    p.add_argument('--delay', type=float, default=None, help='network delay per packet in seconds')
+    add_common(p, pool=True)
+    p.set_defaults(func=cmd_hw4)
+
+    p = sub.add_parser('repeater', help='superdense coding over a repeater chain or mesh')
+    p.add_argument('--hops', type=int, default=2, help='links between the endpoints')
+    p.add_argument('--topology', choices=['line', 'mesh'], default='line')
+    p.add_argument('--data-frame', type=int, default=8, help='bits per data frame')
+    p.add_argument('--epr-frame', type=int, default=4, help='EPR pairs per EPR frame')
+    p.add_argument('--delay', type=float, default=None, help='network delay per packet in seconds')
+    add_common(p)
+    p.set_defaults(func=cmd_repeater)
+
+    p = sub.add_parser('angles', help='optimal Mermin-Ardehali angles, NumPy only')
+    p.add_argument('-n', '--players', type=int, nargs='+', default=[8],
+                   help='numbers of players to look up or optimize')
+    p.add_argument('--recompute', action='store_true',
+                   help='optimize even if the table already has an entry')
+    p.add_argument('--restarts', type=int, default=32, help='parallel starting points')
+    p.add_argument('--steps', type=int, default=400, help='maximum gradient steps')
+    p.add_argument('--seed', type=int, default=None, help='random seed')
+    p.set_defaults(func=cmd_angles)
+
+    p = sub.add_parser('plot', help='plot the dense coding comparison chart')
+    p.set_defaults(func=cmd_plot)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'rounds', 1) < 1 or getattr(args, 'workers', 1) < 1:
+        parser.error('--rounds and --workers must be positive')
+    if args.func is cmd_mermin and not 1 <= args.players <= MAX_PLAYERS:
+        parser.error('-n must be between 1 and %d' % MAX_PLAYERS)
+    if args.func is cmd_angles and min(args.players) < 1:
+        parser.error('-n must be positive')
+    if getattr(args, 'secret', None) == '':
+        parser.error('--secret must not be empty')
+    # Only checked when asked for, so that qunetsim stays unimported otherwise
+    if getattr(args, 'backend', None) is not None and not backend_installed(args.backend):
+        parser.error('backend %s is not provided by the installed qunetsim' % args.backend)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import angle_optimizer
+
+
+def rotation(rz_in, ry_mid, rz_out):
+    """Rz(rz_out) Ry(ry_mid) Rz(rz_in), written out independently of the module."""
+    def rz(t):
+        return np.diag([np.exp(-0.5j * t), np.exp(0.5j * t)])
+
+    def ry(t):
+        c, s = np.cos(t / 2), np.sin(t / 2)
+        return np.array([[c, -s], [s, c]])
+
+    return rz(rz_out) @ ry(ry_mid) @ rz(rz_in)
+
+
+def statevector_win_probability(params):
+    """Average the win probability over every question by full simulation."""
+    n = len(params)
+    ghz = np.zeros(2 ** n, dtype=complex)
+    ghz[0] = ghz[-1] = 1 / np.sqrt(2)
+    parity = np.array([bin(i).count('1') % 2 for i in range(2 ** n)])
+
+    total = 0.0
+    for questions in itertools.product([0, 1], repeat=n):
+        u = np.ones((1, 1))
+        for player, x in enumerate(questions):
+            u = np.kron(u, rotation(*params[player][x]))
+        probs = np.abs(u @ ghz) ** 2
+        w = 0 if sum(questions) % 4 in [0, 1] else 1
+        total += probs[parity == w].sum()
+    return total / 2 ** n
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 4])
+def test_win_probability_matches_statevector(n):
+    rng = np.random.default_rng(n)
+    for params in [rng.uniform(-np.pi, np.pi, (n, 2, 3)), angle_optimizer.uniform_params(n)]:
+        assert angle_optimizer.win_probability(params) == pytest.approx(
+            statevector_win_probability(params), abs=1e-12)
+
+
+def test_win_probability_is_batched():
+    params = np.random.default_rng(0).uniform(-np.pi, np.pi, (5, 3, 2, 3))
+    batched = angle_optimizer.win_probability(params)
+    assert batched.shape == (5,)
+    for p, single in zip(batched, params):
+        assert p == pytest.approx(statevector_win_probability(single), abs=1e-12)
+
+
+@pytest.mark.parametrize('n', [2, 3, 4])
+def test_table_entries_match_statevector(n):
+    params, p = angle_optimizer.optimal_params(n)
+    assert p == pytest.approx(statevector_win_probability(params), abs=1e-9)
+    assert p > 0.85
+
+
+def test_save_table_round_trip(tmp_path):
+    path = str(tmp_path / 'angles.json')
+    table = {'3': {'win_probability': 0.5, 'params': [[[0.0] * 3] * 2] * 3},
+             '2': {'win_probability': 0.5, 'params': [[[0.0] * 3] * 2] * 2}}
+    angle_optimizer.save_table(table, path)
+    assert angle_optimizer.load_table(path) == table
+    assert list(angle_optimizer.load_table(path)) == ['2', '3']
+    assert [f.name for f in tmp_path.iterdir()] == ['angles.json']
+
+
+def test_store_only_replaces_with_a_better_entry():
+    good = angle_optimizer.uniform_params(2)
+    table = {}
+    assert angle_optimizer.store(table, 2, good, 0.85)
+    assert not angle_optimizer.store(table, 2, np.zeros((2, 2, 3)), 0.51)
+    assert not angle_optimizer.store(table, 2, np.zeros((2, 2, 3)), 0.85)
+    assert table['2']['win_probability'] == 0.85
+    assert angle_optimizer.store(table, 2, good, 0.86)
+
+
+def test_optimize_reports_convergence():
+    assert not angle_optimizer.optimize(3, restarts=2, steps=2, seed=0)[2]
+    assert angle_optimizer.optimize(2, restarts=2, seed=0)[2]
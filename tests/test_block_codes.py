@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import block_codes
+
+
+def all_words(k):
+    return np.array(list(itertools.product([0, 1], repeat=k)), dtype=np.uint8).ravel()
+
+
+def test_hamming_round_trip():
+    code = block_codes.Hamming74()
+    data = all_words(4)
+    encoded = code.encode(data)
+    assert len(encoded) == len(data) // 4 * 7
+    assert np.array_equal(code.decode(encoded), data)
+
+
+def test_hamming_codewords_have_zero_syndrome():
+    encoded = block_codes.Hamming74().encode(all_words(4)).reshape(-1, 7)
+    assert not (encoded @ block_codes.HAMMING_H.T % 2).any()
+
+
+@pytest.mark.parametrize('position', range(7))
+def test_hamming_corrects_every_single_error(position):
+    code = block_codes.Hamming74()
+    data = all_words(4)
+    received = code.encode(data).reshape(-1, 7)
+    received[:, position] ^= 1
+    assert np.array_equal(code.decode(received.ravel()), data)
+
+
+def test_hamming_accepts_strings():
+    code = block_codes.Hamming74()
+    encoded = ''.join(map(str, code.encode('10110010')))
+    assert ''.join(map(str, code.decode(encoded))) == '10110010'
+
+
+@pytest.mark.parametrize('n', [1, 3, 5])
+def test_repetition_round_trip_and_majority(n):
+    code = block_codes.Repetition(n)
+    data = all_words(3)
+    encoded = code.encode(data)
+    assert len(encoded) == n * len(data)
+    assert np.array_equal(code.decode(encoded), data)
+
+    # Flip the minority of every block
+    received = encoded.reshape(-1, n)
+    received[:, :n // 2] ^= 1
+    assert np.array_equal(code.decode(received.ravel()), data)
+
+
+def test_repetition_rejects_even_counts():
+    with pytest.raises(Exception):
+        block_codes.Repetition(2)
+
+
+def test_get_code_and_coded_length():
+    assert block_codes.get_code('none') is None
+    assert isinstance(block_codes.get_code('hamming'), block_codes.Hamming74)
+    assert block_codes.get_code('rep5').n == 5
+    with pytest.raises(Exception):
+        block_codes.get_code('golay')
+    assert block_codes.coded_length(None, 16) == 16
+    assert block_codes.coded_length(block_codes.Hamming74(), 16) == 28
+    assert block_codes.coded_length(block_codes.Repetition(3), 16) == 48
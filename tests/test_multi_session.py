@@ -0,0 +1,69 @@
+import contextlib
+import io
+import random
+
+from benchmarks.fresh_process import in_fresh_process
+
+
+def stream(senders, seed):
+    import hw4_todo
+
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return hw4_todo.multi_main(senders, delay=0.0)
+
+
+def stream_with_broken_sender():
+    from qunetsim import Host, Network
+    import hw4_todo
+    import qubit_pool
+
+    hw4_todo.FRAME_TIMEOUT = 0.5
+    network = Network.get_instance()
+    network.start()
+    network.delay = 0.0
+    receiver = Host('R')
+    senders = [Host('S0'), Host('S1')]
+    for sender in senders:
+        sender.add_connection('R')
+        receiver.add_connection(sender.host_id)
+    for host in senders + [receiver]:
+        host.start()
+    network.add_hosts(senders + [receiver])
+
+    def break_off(host, receiver_id):
+        # The header of a data frame, then nothing
+        host.send_qubit(receiver_id, qubit_pool.new_qubit(host), await_ack=True)
+
+    sessions = {'S0': hw4_todo.Session(''), 'S1': hw4_todo.Session('')}
+    senders[0].run_protocol(break_off, ('R',))
+    senders[1].run_protocol(hw4_todo.sender_protocol, ('R', hw4_todo.Session()))
+    with contextlib.redirect_stdout(io.StringIO()):
+        receiver.run_protocol(hw4_todo.multi_receiver_protocol, (sessions,), blocking=True)
+    network.stop(True)
+    return ({s: session.stats for s, session in sessions.items()},
+            sessions['S1'].received == hw4_todo.secret_message)
+
+
+def test_every_sender_arrives_intact():
+    stats = in_fresh_process(stream, 3, 0)
+    assert stats['intact']
+    assert sorted(stats['peers']) == ['S0', 'S1', 'S2']
+    for peer in stats['peers'].values():
+        assert peer['intact'] and not peer['failed']
+        assert peer['bits'] == stats['bits'] // 3
+
+
+def test_every_epr_pair_is_consumed():
+    for seed in range(3):
+        stats = in_fresh_process(stream, 2, seed)
+        for peer in stats['peers'].values():
+            assert peer['eprs_created'] > 0
+            assert peer['eprs_created'] == peer['eprs_consumed']
+
+
+def test_broken_sender_fails_only_its_session():
+    stats, intact = in_fresh_process(stream_with_broken_sender)
+    assert stats['S0']['failed']
+    assert not stats['S1']['failed']
+    assert intact
@@ -0,0 +1,46 @@
+import contextlib
+import io
+
+from benchmarks.fresh_process import in_fresh_process
+
+
+def deliver_and_measure():
+    from qunetsim import Host
+    import qubit_pool
+
+    alice, bob = Host('A'), Host('B')
+    pool = qubit_pool.register(alice, 4)
+    try:
+        q = qubit_pool.new_qubit(alice)
+        q.X()
+        # What delivery through the Network does to a qubit
+        q.host = bob
+        value = qubit_pool.measure(q)
+        again = qubit_pool.new_qubit(alice)
+        return value, again is q, again.host.host_id, qubit_pool.measure(again), pool.stats
+    finally:
+        qubit_pool.unregister('A')
+        alice.backend.stop()
+
+
+def pooled_hw4_transfer():
+    from qunetsim import Network
+    import hw4_todo
+
+    Network.get_instance().delay = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        return hw4_todo.main(pool_cap=16).stats
+
+
+def test_delivered_qubit_returns_to_its_pool():
+    value, same, host_id, reset, stats = in_fresh_process(deliver_and_measure)
+    assert value == 1
+    assert same and host_id == 'A'
+    assert reset == 0
+    assert stats == {'allocated': 1, 'reused': 1, 'recycled': 2, 'discarded': 0}
+
+
+def test_pooled_transfer_reuses_qubits():
+    stats = in_fresh_process(pooled_hw4_transfer)
+    assert stats['reused'] > 0
+    assert stats['recycled'] > 0
@@ -0,0 +1,59 @@
+import networkx as nx
+
+from benchmarks.fresh_process import in_fresh_process
+from repeater import RouteCache, line, mesh
+
+
+def test_route_cache_counts_hits_and_misses():
+    cache = RouteCache()
+    graph = nx.Graph(line(3)[1])
+    assert cache(graph, 'A', 'B') == ['A', 'R1', 'R2', 'B']
+    assert cache(graph, 'A', 'B') == ['A', 'R1', 'R2', 'B']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_route_cache_invalidate_after_edge_swap():
+    cache = RouteCache()
+    graph = nx.Graph([('A', 'R1'), ('R1', 'B'), ('A', 'R2')])
+    assert cache(graph, 'A', 'B') == ['A', 'R1', 'B']
+
+    # Same number of edges, different links
+    graph.remove_edge('R1', 'B')
+    graph.add_edge('R2', 'B')
+    cache.invalidate()
+    assert cache(graph, 'A', 'B') == ['A', 'R2', 'B']
+    assert cache.misses == 2
+
+
+def swap_links():
+    from qunetsim import Host, Network
+    import repeater
+
+    network = Network.get_instance()
+    hosts = {node: Host(node) for node in ['A', 'R1', 'R2', 'B']}
+    for a, b in [('A', 'R1'), ('R1', 'B'), ('A', 'R2')]:
+        hosts[a].add_connection(b)
+        hosts[b].add_connection(a)
+    network.add_hosts(list(hosts.values()))
+    network.quantum_routing_algo = repeater.RouteCache()
+    network.classical_routing_algo = repeater.RouteCache()
+    try:
+        before = network.get_quantum_route('A', 'B'), network.get_classical_route('A', 'B')
+        repeater.remove_link(network, 'R1', 'B')
+        repeater.add_link(network, 'R2', 'B')
+        after = network.get_quantum_route('A', 'B'), network.get_classical_route('A', 'B')
+        return before, after
+    finally:
+        hosts['A'].backend.stop()
+
+
+def test_link_changes_invalidate_network_routes():
+    before, after = in_fresh_process(swap_links)
+    assert before == (['A', 'R1', 'B'], ['A', 'R1', 'B'])
+    assert after == (['A', 'R2', 'B'], ['A', 'R2', 'B'])
+
+
+def test_mesh_shortest_path_has_requested_hops():
+    for hops in range(1, 6):
+        nodes, links = mesh(hops)
+        assert len(nx.shortest_path(nx.Graph(links), 'A', 'B')) - 1 == hops